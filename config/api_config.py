@@ -1,4 +1,5 @@
 import os
+import types
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement
@@ -17,23 +18,24 @@ class ScopusConfig:
     MAX_REQUESTS_PER_SECOND = int(os.getenv('MAX_REQUESTS_PER_SECOND', 9))
     MAX_RESULTS_PER_REQUEST = int(os.getenv('MAX_RESULTS_PER_REQUEST', 200))
     
-    # Headers HTTP
-    HEADERS = {
+    # Headers HTTP (gelés : partagés sans risque de mutation accidentelle)
+    HEADERS = types.MappingProxyType({
         'X-ELS-APIKey': API_KEY,
         'Accept': 'application/json',
         'User-Agent': 'ScopusChatbot/1.0'
-    }
-    
+    })
+
     # Champs à extraire (SEULEMENT les champs valides testés)
-    SEARCH_FIELDS = [
+    # Tuple immuable : hashable pour le caching, non modifiable
+    SEARCH_FIELDS = (
         'dc:identifier',
-        'dc:title', 
+        'dc:title',
         'dc:creator',
         'prism:publicationName',
         'prism:coverDate',
         'prism:doi',
         'citedby-count'
-    ]
+    )
     
     @classmethod
     def validate_config(cls):
@@ -2,19 +2,24 @@ import requests
 import pandas as pd
 import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from tqdm import tqdm
 import logging
 from typing import List, Dict, Optional
 import sys
 import os
+from pathlib import Path
 
-# Supprimer le module du cache pour forcer le rechargement
-if 'config.api_config' in sys.modules:
-    del sys.modules['config.api_config']
+# Chemins du projet calculés une seule fois à l'import
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LOG_DIR = PROJECT_ROOT / 'logs'
+DATA_DIR = PROJECT_ROOT / 'data' / 'raw'
 
-# Ajouter le dossier parent au path pour importer config
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Ajouter le dossier parent au path pour importer config (idempotent)
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.append(str(PROJECT_ROOT))
 from config.api_config import ScopusConfig
 
 class ScopusExtractor:
@@ -25,6 +30,24 @@ class ScopusExtractor:
         self.config = ScopusConfig()
         self.session = requests.Session()
         self.session.headers.update(self.config.HEADERS)
+
+        # Pool de connexions dimensionné pour les workers concurrents
+        # (keep-alive : évite un handshake TCP/TLS par requête) avec
+        # retries sur les erreurs transitoires
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        pool_size = self.config.MAX_REQUESTS_PER_SECOND * 2
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset(['GET'])
+            )
+        )
+        self.session.mount('https://', adapter)
         
         # Configuration du logging
         self.setup_logging()
@@ -36,19 +59,19 @@ class ScopusExtractor:
         self.total_requests = 0
         self.successful_requests = 0
         self.failed_requests = 0
+
+        # Limiteur de débit partagé entre les workers concurrents ; le
+        # même verrou protège aussi les compteurs de statistiques
+        # (incréments += non atomiques depuis plusieurs threads)
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
     
     def setup_logging(self):
         """Configure le système de logging"""
-        import os
-        
-        # Obtenir le chemin du dossier racine du projet
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        log_dir = os.path.join(project_root, 'logs')
-        
         # Créer le dossier logs s'il n'existe pas
-        os.makedirs(log_dir, exist_ok=True)
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
         
-        log_file = os.path.join(log_dir, 'extraction.log')
+        log_file = LOG_DIR / 'extraction.log'
         
         logging.basicConfig(
             level=logging.INFO,
@@ -60,10 +83,25 @@ class ScopusExtractor:
         )
         self.logger = logging.getLogger(__name__)
     
+    def _throttle(self):
+        """
+        Limiteur de débit (token bucket simplifié) : espace les départs
+        de requêtes de 1/MAX_REQUESTS_PER_SECOND, même avec plusieurs
+        workers en parallèle
+        """
+        interval = 1.0 / self.config.MAX_REQUESTS_PER_SECOND
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + interval
+        if wait > 0:
+            time.sleep(wait)
+
     def search_articles(self, query: str, count: int = 25, start: int = 0) -> Dict:
         """
         Recherche d'articles via l'API Scopus
         """
+        self._throttle()
         params = {
             'query': query,
             'count': min(count, self.config.MAX_RESULTS_PER_REQUEST),
@@ -72,7 +110,8 @@ class ScopusExtractor:
         }
         
         try:
-            self.total_requests += 1
+            with self._rate_lock:
+                self.total_requests += 1
             response = self.session.get(self.config.SEARCH_URL, params=params)
             
             # Gestion du rate limiting
@@ -82,12 +121,14 @@ class ScopusExtractor:
                 response = self.session.get(self.config.SEARCH_URL, params=params)
             
             response.raise_for_status()
-            self.successful_requests += 1
+            with self._rate_lock:
+                self.successful_requests += 1
             
             return response.json()
             
         except requests.exceptions.RequestException as e:
-            self.failed_requests += 1
+            with self._rate_lock:
+                self.failed_requests += 1
             self.logger.error(f"Erreur lors de la requête: {e}")
             return {}
     
@@ -113,25 +154,30 @@ class ScopusExtractor:
         
         all_articles = []
         batch_size = self.config.MAX_RESULTS_PER_REQUEST
-        
+
+        # Lots (start, taille) construits d'avance puis récupérés en
+        # parallèle : la charge est purement I/O (latence API), le
+        # débit reste borné par _throttle
+        batches = [(start, min(batch_size, results_to_extract - start))
+                   for start in range(0, results_to_extract, batch_size)]
+
         # Barre de progression
         with tqdm(total=results_to_extract, desc="Extraction") as pbar:
-            for start in range(0, results_to_extract, batch_size):
-                current_batch_size = min(batch_size, results_to_extract - start)
-                
-                # Requête pour ce batch
-                batch_result = self.search_articles(query, current_batch_size, start)
-                
-                if 'search-results' in batch_result:
-                    entries = batch_result['search-results'].get('entry', [])
-                    articles = self.process_articles(entries)
-                    all_articles.extend(articles)
-                    
-                    pbar.update(len(articles))
-                    self.logger.info(f"Traité {start + len(articles)}/{results_to_extract} articles")
-                
-                # Pause pour respecter le rate limiting
-                time.sleep(1.0 / self.config.MAX_REQUESTS_PER_SECOND)
+            with ThreadPoolExecutor(
+                    max_workers=self.config.MAX_REQUESTS_PER_SECOND) as executor:
+                futures = [executor.submit(self.search_articles, query, size, start)
+                           for start, size in batches]
+
+                for future in as_completed(futures):
+                    batch_result = future.result()
+
+                    if 'search-results' in batch_result:
+                        entries = batch_result['search-results'].get('entry', [])
+                        articles = self.process_articles(entries)
+                        all_articles.extend(articles)
+
+                        pbar.update(len(articles))
+                        self.logger.info(f"Traité {len(all_articles)}/{results_to_extract} articles")
         
         self.logger.info(f"Extraction terminée: {len(all_articles)} articles récupérés")
         return all_articles
@@ -140,59 +186,59 @@ class ScopusExtractor:
         """
         Traite les entrées brutes de l'API - Version corrigée
         """
-        processed_articles = []
-        
-        for entry in entries:
-            # Debug: afficher les champs disponibles pour le premier article
-            if len(processed_articles) == 0:
-                self.logger.info(f"🔍 Champs disponibles dans l'API: {list(entry.keys())}")
-            
-            article = {
-                'scopus_id': self.safe_get(entry, 'dc:identifier', '').replace('SCOPUS_ID:', ''),
-                'title': self.safe_get(entry, 'dc:title', ''),
-                'publication_name': self.safe_get(entry, 'prism:publicationName', ''),
-                'cover_date': self.safe_get(entry, 'prism:coverDate', ''),
-                'doi': self.safe_get(entry, 'prism:doi', ''),
-                'citation_count': int(self.safe_get(entry, 'citedby-count', 0)),
-                'authors': self.safe_get(entry, 'dc:creator', ''),
-                'extraction_date': datetime.now().isoformat(),
-                # Champs qui seront vides avec la configuration actuelle
-                'abstract': '',  # dc:description pas dans SEARCH_FIELDS
-                'keywords': '',  # authkeywords pas dans SEARCH_FIELDS
-                'subject_areas': ''  # subject-area pas dans SEARCH_FIELDS
-            }
-            processed_articles.append(article)
-        
-        return processed_articles
+        # Debug: afficher les champs disponibles pour le premier article
+        if entries:
+            self.logger.info(f"🔍 Champs disponibles dans l'API: {list(entries[0].keys())}")
+
+        # Date calculée une fois par lot, accès dict direct (les entrées
+        # sont toujours des dicts issus du JSON de l'API)
+        now = datetime.now().isoformat()
+        return [{
+            'scopus_id': (entry.get('dc:identifier') or '').replace('SCOPUS_ID:', ''),
+            'title': entry.get('dc:title', ''),
+            'publication_name': entry.get('prism:publicationName', ''),
+            'cover_date': entry.get('prism:coverDate', ''),
+            'doi': entry.get('prism:doi', ''),
+            'citation_count': int(entry.get('citedby-count', 0) or 0),
+            'authors': entry.get('dc:creator', ''),
+            'extraction_date': now,
+            # Champs qui seront vides avec la configuration actuelle
+            'abstract': '',  # dc:description pas dans SEARCH_FIELDS
+            'keywords': '',  # authkeywords pas dans SEARCH_FIELDS
+            'subject_areas': ''  # subject-area pas dans SEARCH_FIELDS
+        } for entry in entries]
     
     def safe_get(self, dictionary: Dict, key: str, default=''):
         """Récupération sécurisée des valeurs"""
         return dictionary.get(key, default) if dictionary else default
     
-    def save_data(self, articles: List[Dict], filename: str):
-        """Sauvegarde les données"""
+    def save_data(self, articles: List[Dict], filename: str, formats=('json',)):
+        """Sauvegarde les données (CSV en option, le pipeline lit le JSON)"""
         if not articles:
             self.logger.warning("Aucun article à sauvegarder")
             return
-        
-        # Obtenir le chemin du dossier racine du projet
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_dir = os.path.join(project_root, 'data', 'raw')
-        
+
         # Créer le dossier data/raw s'il n'existe pas
-        os.makedirs(data_dir, exist_ok=True)
-        
-        # Sauvegarde JSON
-        json_file = os.path.join(data_dir, f"{filename}.json")
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(articles, f, ensure_ascii=False, indent=2)
-        
-        # Sauvegarde CSV (version aplatie)
-        csv_file = os.path.join(data_dir, f"{filename}.csv")
-        df = self.articles_to_dataframe(articles)
-        df.to_csv(csv_file, index=False, encoding='utf-8')
-        
-        self.logger.info(f"Données sauvegardées: {json_file} et {csv_file}")
+        DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+        saved_files = []
+
+        # Sauvegarde JSON (compact : sans indent, le pretty-print
+        # triple la taille du fichier pour rien)
+        if 'json' in formats:
+            json_file = DATA_DIR / f"{filename}.json"
+            with open(json_file, 'w', encoding='utf-8') as f:
+                json.dump(articles, f, ensure_ascii=False)
+            saved_files.append(str(json_file))
+
+        # Sauvegarde CSV (version aplatie), seulement si demandée
+        if 'csv' in formats:
+            csv_file = DATA_DIR / f"{filename}.csv"
+            df = self.articles_to_dataframe(articles)
+            df.to_csv(csv_file, index=False, encoding='utf-8')
+            saved_files.append(str(csv_file))
+
+        self.logger.info(f"Données sauvegardées: {' et '.join(saved_files)}")
     
     def articles_to_dataframe(self, articles: List[Dict]) -> pd.DataFrame:
         """Convertit les articles en DataFrame"""
@@ -20,7 +20,14 @@ def validate_database():
     
     try:
         conn = sqlite3.connect(db_path)
-        
+        # PRAGMAs lecture seule : pages mappées en mémoire (zéro copie)
+        # et cache élargi pour couvrir la table articles
+        for pragma in ('PRAGMA mmap_size=268435456',
+                       'PRAGMA cache_size=-200000',
+                       'PRAGMA temp_store=MEMORY',
+                       'PRAGMA synchronous=OFF'):
+            conn.execute(pragma)
+
         # 1. Vérification des tables requises par le prof
         print("📋 Vérification des tables:")
         cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -122,33 +129,42 @@ def show_database_content():
     
     try:
         conn = sqlite3.connect('data/processed/scopus_database.db')
-        
-        # Tous les articles
+        # PRAGMAs lecture seule : pages mappées en mémoire (zéro copie)
+        # et cache élargi pour couvrir la table articles
+        for pragma in ('PRAGMA mmap_size=268435456',
+                       'PRAGMA cache_size=-200000',
+                       'PRAGMA temp_store=MEMORY',
+                       'PRAGMA synchronous=OFF'):
+            conn.execute(pragma)
+
+        # Tous les articles (curseur direct : pas de DataFrame
+        # intermédiaire juste pour imprimer)
         print("📚 TOUS LES ARTICLES:")
-        df_articles = pd.read_sql_query('''
+        cursor = conn.execute('''
             SELECT scopus_id, title, year, publication_name
             FROM articles
             ORDER BY year DESC, title
-        ''', conn)
-        
-        for i, row in df_articles.iterrows():
-            print(f"  {i+1}. {row['title']}")
-            print(f"     ID: {row['scopus_id']}, Année: {row['year']}")
-            print(f"     Journal: {row['publication_name']}")
+        ''')
+
+        for i, (scopus_id, title, year, publication_name) in enumerate(cursor.fetchall(), 1):
+            print(f"  {i}. {title}")
+            print(f"     ID: {scopus_id}, Année: {year}")
+            print(f"     Journal: {publication_name}")
             print()
-        
-        # Tous les auteurs
+
+        # Tous les auteurs : l'agrégation reste dans SQLite (servie par
+        # l'index sur article_authors.author_id), une seule requête
         print("👥 TOUS LES AUTEURS:")
-        df_authors = pd.read_sql_query('''
-            SELECT preferred_name, COUNT(*) as article_count
+        cursor = conn.execute('''
+            SELECT a.preferred_name, COUNT(aa.article_id) AS article_count
             FROM authors a
-            JOIN article_authors aa ON a.id = aa.author_id
-            GROUP BY a.id, preferred_name
+            JOIN article_authors aa ON aa.author_id = a.id
+            GROUP BY a.id
             ORDER BY article_count DESC
-        ''', conn)
-        
-        for _, row in df_authors.iterrows():
-            print(f"  • {row['preferred_name']} ({row['article_count']} article(s))")
+        ''')
+
+        for preferred_name, article_count in cursor.fetchall():
+            print(f"  • {preferred_name} ({article_count} article(s))")
         
         conn.close()
         